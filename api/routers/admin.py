@@ -0,0 +1,68 @@
+import hmac
+import json
+import uuid
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from api.types import ProfileSummary
+from core.config.settings import settings
+from core.profiling.profiler import list_profiles
+
+router = APIRouter()
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether token matches the configured admin token; always False when none is configured"""
+    if not settings.admin_token or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.admin_token.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Require a valid X-Admin-Token; admin endpoints don't exist unless ADMIN_TOKEN is set"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing admin token")
+
+
+def _profile_path(request_id: str, suffix: str):
+    # request_ids are UUIDs; rejecting anything else keeps paths inside profile_dir
+    try:
+        uuid.UUID(request_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    path = settings.profile_dir / f"{request_id}{suffix}"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
+
+
+@router.get("/profiles", response_model=List[ProfileSummary], dependencies=[Depends(require_admin)])
+async def get_profiles() -> List[ProfileSummary]:
+    """List stored run profiles, newest first"""
+    return [ProfileSummary(**summary) for summary in list_profiles()]
+
+
+@router.get("/profiles/{request_id}", response_model=ProfileSummary, dependencies=[Depends(require_admin)])
+async def get_profile(request_id: str) -> ProfileSummary:
+    """Step timings and tracemalloc snapshots for one run"""
+    with open(_profile_path(request_id, ".json"), encoding="utf-8") as f:
+        return ProfileSummary(**json.load(f))
+
+
+@router.get("/profiles/{request_id}/download", dependencies=[Depends(require_admin)])
+async def download_profile(request_id: str) -> FileResponse:
+    """
+    Download the cProfile stats for one run
+
+    Load with `pstats.Stats("<request_id>.prof")` or a viewer such as snakeviz.
+    """
+    return FileResponse(
+        _profile_path(request_id, ".prof"),
+        media_type="application/octet-stream",
+        filename=f"{request_id}.prof",
+    )
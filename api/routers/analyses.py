@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from api.types import AnalysisProgressEvent
+from core.config.settings import settings
+from core.events.bus import TERMINAL_EVENTS, progress_bus
+from core.search.index import search_index
+
+router = APIRouter()
+
+
+def _format_event(event: AnalysisProgressEvent) -> str:
+    return f"event: {event.event}\ndata: {event.model_dump_json()}\n\n"
+
+
+async def _event_stream(request_id: str) -> AsyncIterator[str]:
+    """Format progress bus messages as server-sent events"""
+    subscription = progress_bus.subscribe(request_id)
+    deadline = time.monotonic() + settings.progress_stream_timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # The run may have been lost (e.g. a crashed worker); don't stream forever
+                yield _format_event(AnalysisProgressEvent(
+                    request_id=request_id, event="timeout", timestamp=datetime.utcnow()
+                ))
+                break
+
+            message = await subscription.get(timeout=min(settings.progress_keepalive_interval, remaining))
+            if message is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+
+            event = AnalysisProgressEvent(**message)
+            yield _format_event(event)
+            if event.event in TERMINAL_EVENTS:
+                break
+    finally:
+        subscription.close()
+
+
+async def _completed_stream(request_id: str, output_path: str) -> AsyncIterator[str]:
+    """Single terminal event for an analysis that finished before this process saw it"""
+    yield _format_event(AnalysisProgressEvent(
+        request_id=request_id,
+        event="completed",
+        timestamp=datetime.utcnow(),
+        data={"path": output_path},
+    ))
+
+
+@router.get("/analyses/{request_id}/events")
+async def analysis_events(request_id: str) -> StreamingResponse:
+    """
+    Stream progress for an analysis as server-sent events
+
+    Emits queued, urls_discovered, urls_filtered, page_scraped, error and
+    saved events while the analysis runs, and closes the stream after the
+    completed or failed event. Events published before the client connected
+    are replayed first. Analyses this process has no history for are looked
+    up by their saved output: finished ones get a single completed event,
+    unknown ones a 404.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if not progress_bus.history(request_id):
+        output_path: Optional[str] = await asyncio.to_thread(search_index.output_path, request_id)
+        if output_path is None:
+            raise HTTPException(status_code=404, detail="No progress found for this request_id")
+        return StreamingResponse(
+            _completed_stream(request_id, output_path),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    return StreamingResponse(
+        _event_stream(request_id),
+        media_type="text/event-stream",
+        headers=headers,
+    )
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from api.routers.admin import require_admin
+from api.types import ExportResponse
+from features.export.parquet import ExportInProgressError, ExportUnavailableError, export_analyses
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.post("/analyses", response_model=ExportResponse, dependencies=[Depends(require_admin)])
+async def export_analyses_to_parquet() -> ExportResponse:
+    """
+    Export analyses saved since the last run to partitioned Parquet
+
+    Writes `analyses` (metadata) and `pages` (scraped markdown) datasets
+    under the export directory, partitioned by date and domain. Requires
+    X-Admin-Token, like the other operational endpoints.
+    """
+    try:
+        stats = await asyncio.to_thread(export_analyses)
+        return ExportResponse(**stats)
+
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except ExportInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"Failed to export analyses: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to export analyses: {str(e)}"
+        )
@@ -4,6 +4,7 @@ from datetime import datetime
 from fastapi import APIRouter
 
 from api.types import DetailedHealthResponse, HealthResponse
+from core.config.settings import settings
 
 router = APIRouter()
 
@@ -25,11 +26,13 @@ async def detailed_health() -> DetailedHealthResponse:
     
     # TODO: Add actual service health checks
     services = {
-        "inngest": "operational",  # Would check Inngest connectivity
-        "firecrawl": "operational"  # Would check Firecrawl API status
+        # Would check Inngest connectivity; not used with the local executor
+        "inngest": "operational" if settings.executor == "inngest" else "disabled",
+        "firecrawl": "operational",  # Would check Firecrawl API status
     }
     
     return DetailedHealthResponse(
         uptime_seconds=uptime,
+        executor=settings.executor,
         services=services
     )
\ No newline at end of file
@@ -1,9 +1,13 @@
 import logging
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException
+from typing import Optional
 
+from fastapi import APIRouter, Header, HTTPException
+
+from api.routers.admin import is_admin_token
 from api.types import RegisterRequest, RegisterResponse
+from core.queue.outbox import OutboxFullError
 from features.extraction.processor import trigger_analysis
 
 router = APIRouter()
@@ -11,14 +15,27 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/register", response_model=RegisterResponse)
-async def register_prospect(request: RegisterRequest) -> RegisterResponse:
+async def register_prospect(
+    request: RegisterRequest,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+) -> RegisterResponse:
     """
     Register a new prospect for analysis
     
-    This endpoint validates the request and triggers asynchronous processing
-    via Inngest. It returns immediately while the heavy processing happens
-    in the background.
+    This endpoint validates the request and queues it in the local event
+    outbox, which is delivered to the pipeline executor in the background. It returns
+    immediately while the heavy processing happens asynchronously, or 429
+    with Retry-After when the outbox backlog is too large.
+
+    Send `X-Profile: 1` (or `"profile": true`) together with a valid
+    `X-Admin-Token` to profile the analysis run; without the token it's a 403.
     """
+    if x_profile and x_profile.lower() in ("1", "true", "yes"):
+        request.profile = True
+    if request.profile and not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling a run requires a valid X-Admin-Token")
+
     try:
         logger.info(f"Received registration for: {request.first_name} {request.last_name}")
         
@@ -32,6 +49,14 @@ async def register_prospect(request: RegisterRequest) -> RegisterResponse:
             timestamp=datetime.utcnow()
         )
         
+    except OutboxFullError as e:
+        logger.warning(f"Shedding registration, outbox backlog is {e.backlog}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many registrations are waiting to be processed, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     except Exception as e:
         logger.error(f"Failed to process registration: {e}")
         raise HTTPException(
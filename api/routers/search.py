@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from api.types import SearchResponse, SearchResult
+from core.config.settings import settings
+from core.search.index import search_index
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1),
+    domain: Optional[str] = None,
+) -> SearchResponse:
+    """
+    Search scraped website content
+
+    Returns pages containing every term in `q`, ranked by relevance, with a
+    highlighted snippet. Optionally restricted to one prospect domain.
+    """
+    start = time.perf_counter()
+    try:
+        rows = await asyncio.to_thread(
+            search_index.search, q, min(limit, settings.search_max_results), domain
+        )
+    except Exception as e:
+        logger.error(f"Search failed for query {q!r}: {e}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    return SearchResponse(
+        query=q,
+        results=[SearchResult(**row) for row in rows],
+        took_ms=(time.perf_counter() - start) * 1000,
+    )
@@ -3,11 +3,15 @@ Pydantic models for API request/response validation
 """
 
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse
+import ipaddress
 import uuid
 
 from pydantic import BaseModel, Field, model_validator
 
+from core.config.settings import settings
+
 
 class RegisterRequest(BaseModel):
     """Request model for the /register endpoint"""
@@ -15,6 +19,8 @@ class RegisterRequest(BaseModel):
     last_name: str = Field(..., min_length=1, max_length=100)
     company_website: Optional[str] = Field(None, max_length=500)
     linkedin: Optional[str] = Field(None, max_length=500)
+    callback_url: Optional[str] = Field(None, max_length=500)
+    profile: bool = False  # capture cProfile and tracemalloc data for this run
     
     @model_validator(mode='after')
     def validate_at_least_one_provided(self) -> 'RegisterRequest':
@@ -23,6 +29,28 @@ class RegisterRequest(BaseModel):
             raise ValueError('At least one of company_website or linkedin must be provided')
         return self
     
+    @model_validator(mode='after')
+    def validate_callback_url(self) -> 'RegisterRequest':
+        """Ensure the completion webhook, if given, is an absolute http(s) URL on a public host"""
+        if not self.callback_url:
+            return self
+        if not (self.callback_url.startswith('http://') or self.callback_url.startswith('https://')):
+            raise ValueError('callback_url must be an absolute http:// or https:// URL')
+        
+        host = urlparse(self.callback_url).hostname
+        if not host:
+            raise ValueError('callback_url must include a host')
+        if settings.callback_allow_private_hosts:
+            return self
+        # Hostnames are re-checked after DNS resolution when the webhook is sent
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            address = None
+        if (address is not None and not address.is_global) or host == 'localhost' or host.endswith(('.localhost', '.local', '.internal')):
+            raise ValueError('callback_url must point to a public host')
+        return self
+    
     def model_post_init(self, __context) -> None:
         """Post-initialization validation and URL normalization"""
         if self.company_website and not (self.company_website.startswith('http://') or self.company_website.startswith('https://')):
@@ -44,6 +72,55 @@ class RegisterResponse(BaseModel):
     timestamp: datetime
 
 
+class AnalysisProgressEvent(BaseModel):
+    """Progress event emitted while an analysis runs (SSE stream and webhook payload)"""
+    request_id: str
+    event: str
+    timestamp: datetime
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class SearchResult(BaseModel):
+    """A single page matching a search query"""
+    request_id: str
+    domain: str
+    url: str
+    indexed_at: datetime
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Response model for the /search endpoint"""
+    query: str
+    results: List[SearchResult] = Field(default_factory=list)
+    took_ms: float
+
+
+class ExportResponse(BaseModel):
+    """Response model for an incremental Parquet export run"""
+    files_scanned: int
+    files_skipped: int
+    analyses_exported: int
+    analyses_replaced: int = 0
+    pages_exported: int
+    watermark: Optional[str] = None
+    took_ms: float
+
+
+class ProfileSummary(BaseModel):
+    """Stored profile of a pipeline run"""
+    request_id: str
+    reason: str
+    created_at: datetime
+    total_seconds: float
+    step_timings: Dict[str, float] = Field(default_factory=dict)
+    memory: List[Dict[str, Any]] = Field(default_factory=list)
+    has_cprofile: bool = False
+    cprofile_skipped_steps: List[str] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str = "healthy"
@@ -54,6 +131,7 @@ class DetailedHealthResponse(HealthResponse):
     """Detailed health check response"""
     version: str = "0.1.0"
     uptime_seconds: float
+    executor: str
     services: Dict[str, str] = Field(default_factory=lambda: {
         "inngest": "unknown",
         "firecrawl": "unknown"
@@ -0,0 +1,123 @@
+"""
+Executor overhead and throughput benchmark
+
+Two modes:
+
+    # Step overhead of the local executor, in-process (no server needed)
+    python -m benchmarks.executor_bench steps --jobs 2000 --steps 5
+
+    # End-to-end throughput against a running server. Start the app with
+    # EXECUTOR=local, or with EXECUTOR=inngest plus `npx inngest-cli dev`,
+    # and compare the two runs.
+    python -m benchmarks.executor_bench http --url http://localhost:8000 --jobs 200
+
+The http mode registers LinkedIn-only prospects, which skip Firecrawl, so the
+measured time is executor and step overhead plus saving the output file. It
+waits for each run's `completed` event on the SSE progress stream.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from core.executor.local import LocalExecutor
+from core.queue.outbox import EventOutbox
+
+
+async def _noop(value: int) -> int:
+    return value
+
+
+async def bench_steps(jobs: int, steps: int, concurrency: int) -> None:
+    async def pipeline(data: dict, step) -> None:
+        for i in range(steps):
+            await step.run(f"step-{i}", _noop, i)
+
+    class DirectStep:
+        async def run(self, step_id, handler, *args):
+            return await handler(*args)
+
+    # Baseline: the same pipeline called directly
+    start = time.perf_counter()
+    for _ in range(jobs):
+        await pipeline({}, DirectStep())
+    direct = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        executor = LocalExecutor(
+            EventOutbox(Path(tmp) / "jobs.db", max_backlog=jobs),
+            handlers={"bench": pipeline},
+            concurrency=concurrency,
+            max_attempts=1,
+            lease_timeout=60,
+        )
+        executor.start()
+        start = time.perf_counter()
+        await executor.submit([{"name": "bench", "data": {"n": n}} for n in range(jobs)])
+        await executor.join(timeout=300)
+        elapsed = time.perf_counter() - start
+        await executor.stop()
+
+    per_job = (elapsed - direct) / jobs
+    print(f"jobs={jobs} steps/job={steps} concurrency={concurrency}")
+    print(f"direct calls:    {direct * 1000:.1f} ms total")
+    print(f"local executor:  {elapsed * 1000:.1f} ms total, {jobs / elapsed:.0f} jobs/s")
+    print(f"overhead:        {per_job * 1e6:.0f} us/job, {per_job / max(steps, 1) * 1e6:.1f} us/step (incl. queueing)")
+
+
+async def _wait_completed(client: httpx.AsyncClient, request_id: str) -> None:
+    async with client.stream("GET", f"/analyses/{request_id}/events") as response:
+        async for line in response.aiter_lines():
+            if line == "event: completed":
+                return
+            if line == "event: failed":
+                raise RuntimeError(f"Analysis {request_id} failed")
+
+
+async def bench_http(url: str, jobs: int) -> None:
+    payload = {"first_name": "Bench", "last_name": "User", "linkedin": "https://linkedin.com/in/bench"}
+    latencies: List[float] = []
+
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        async def one() -> None:
+            start = time.perf_counter()
+            response = await client.post("/register", json=payload)
+            response.raise_for_status()
+            await _wait_completed(client, response.json()["request_id"])
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(jobs)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"jobs={jobs} url={url}")
+    print(f"throughput: {jobs / elapsed:.1f} analyses/s")
+    print(f"latency:    p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    steps_parser = subparsers.add_parser("steps", help="in-process local executor step overhead")
+    steps_parser.add_argument("--jobs", type=int, default=2000)
+    steps_parser.add_argument("--steps", type=int, default=5)
+    steps_parser.add_argument("--concurrency", type=int, default=4)
+
+    http_parser = subparsers.add_parser("http", help="end-to-end throughput against a running server")
+    http_parser.add_argument("--url", default="http://localhost:8000")
+    http_parser.add_argument("--jobs", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.mode == "steps":
+        asyncio.run(bench_steps(args.jobs, args.steps, args.concurrency))
+    else:
+        asyncio.run(bench_http(args.url, args.jobs))
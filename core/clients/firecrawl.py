@@ -1,6 +1,6 @@
+import asyncio
 from loguru import logger
-import time
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set
 from urllib.parse import urlparse
 
 from firecrawl import Firecrawl
@@ -42,7 +42,10 @@ class FirecrawlClient:
 
         try:
             # map() returns an object with a 'links' attribute
-            result = self.client.map(url=base_url, limit=settings.max_urls_to_scrape)
+            # The Firecrawl SDK is synchronous; keep it off the event loop
+            result = await asyncio.to_thread(
+                self.client.map, url=base_url, limit=settings.max_urls_to_scrape
+            )
             
             # Extract the links list from the result object
             links = result.links if hasattr(result, 'links') else result
@@ -116,9 +119,16 @@ class FirecrawlClient:
             
         return max(0.0, score)
     
-    async def scrape_multiple_urls(self, urls: list[str]) -> dict[str, str]:
+    async def scrape_multiple_urls(
+        self,
+        urls: list[str],
+        on_page_scraped: Optional[Callable[[str, int, int, Optional[str]], None]] = None
+    ) -> dict[str, str]:
         """
         Scrape content from multiple URLs with rate limiting
+
+        on_page_scraped, if given, is called after each URL with
+        (url, index, total, error) where error is None on success.
         """
         scraped_content = {}
         
@@ -126,17 +136,20 @@ class FirecrawlClient:
             try:
                 # Add small delay between requests to respect rate limits
                 if i > 0:
-                    import time
-                    time.sleep(1)  # 1 second delay between requests
+                    await asyncio.sleep(1)  # 1 second delay between requests
                 
                 result = await self.scrape_url(url)
                 scraped_content[url] = result['content']
                 logger.info(f"Successfully scraped {i+1}/{len(urls)}: {url}")
+                if on_page_scraped:
+                    on_page_scraped(url, i + 1, len(urls), None)
                 
             except Exception as e:
                 error_msg = f"Failed to scrape {url}: {str(e)}"
                 logger.warning(error_msg)
                 scraped_content[url] = f"Error: {str(e)}"
+                if on_page_scraped:
+                    on_page_scraped(url, i + 1, len(urls), str(e))
         
         return scraped_content
     
@@ -150,7 +163,7 @@ class FirecrawlClient:
         
         try:
             # Use markdown format for better LLM processing
-            result = self.client.scrape(url=url, formats=['markdown'])
+            result = await asyncio.to_thread(self.client.scrape, url=url, formats=['markdown'])
             
             if result and result.markdown:
                 content = result.markdown
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -17,12 +17,56 @@ class Settings(BaseSettings):
     inngest_event_key: Optional[str] = "your_key"
     inngest_signing_key: Optional[str] = "your_key"
     
+    # Pipeline executor: "inngest" (Inngest dev server / cloud) or "local"
+    # (in-process asyncio workers, no Inngest required)
+    executor: Literal["inngest", "local"] = "inngest"
+    
     # Paths
     output_dir: Path = Path("outputs")
     
     # Rate limiting and processing limits
     max_urls_to_scrape: int = 10
     max_content_length: int = 50000  # characters
+
+    # Event outbox (durable queue between /register and Inngest)
+    outbox_path: Path = Path("data/outbox.db")
+    outbox_max_backlog: int = 1000  # /register returns 429 above this
+    outbox_retry_after: int = 5  # seconds, sent as Retry-After when shedding load
+    outbox_batch_size: int = 50
+    outbox_flush_interval: float = 0.5  # seconds
+    outbox_max_backoff: float = 60.0  # seconds
+    outbox_claim_lease: float = 30.0  # seconds a claimed batch is hidden from other flushers
+
+    # Local executor (used when executor="local")
+    local_executor_concurrency: int = 4  # pipeline runs in parallel
+    local_executor_queue_path: Path = Path("data/jobs.db")
+    local_executor_max_queued: int = 1000  # outbox holds events back above this
+    local_executor_max_attempts: int = 4
+    local_executor_retry_backoff: float = 2.0  # seconds, doubled per attempt
+    local_executor_lease_timeout: float = 600.0  # seconds before a crashed worker's runs are retried
+
+    # Progress events (SSE stream and completion webhooks)
+    progress_buffer_size: int = 100  # events buffered per subscriber
+    progress_max_tracked_requests: int = 1000  # requests with replayable history
+    progress_keepalive_interval: float = 15.0  # seconds
+    callback_timeout: float = 10.0  # seconds
+    callback_max_attempts: int = 3
+    callback_retry_backoff: float = 2.0  # seconds, doubled per attempt
+    callback_allow_private_hosts: bool = False  # allow loopback/private webhook targets (dev only)
+    progress_stream_timeout: float = 3600.0  # seconds before an open stream is closed
+
+    # Full-text search over scraped content
+    search_index_path: Path = Path("data/search.db")
+    search_max_results: int = 100
+
+    # Columnar export of analyses
+    export_dir: Path = Path("exports")
+    export_batch_size: int = 50  # analyses held in memory per written batch
+
+    # On-demand profiling of pipeline runs
+    profile_dir: Path = Path("data/profiles")
+    profile_slow_run_threshold: Optional[float] = None  # seconds; None disables auto capture
+    admin_token: Optional[str] = None  # X-Admin-Token for /admin and profiling; both disabled when unset
     
     class Config:
         env_file = ".env"
@@ -32,6 +76,10 @@ class Settings(BaseSettings):
         super().__init__(**kwargs)
         # Ensure output directory exists
         self.output_dir.mkdir(exist_ok=True)
+        self.outbox_path.parent.mkdir(parents=True, exist_ok=True)
+        self.search_index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.local_executor_queue_path.parent.mkdir(parents=True, exist_ok=True)
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+In-process pub/sub bus for analysis progress events
+
+Every subscriber gets its own bounded queue; when a consumer falls behind the
+oldest undelivered events are dropped, so a slow client can never make the
+process buffer more than `buffer_size` events on its behalf. A short history
+is kept per request so clients that subscribe late still see what happened.
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from core.config.settings import settings
+
+# Events after which no more progress will be published for a request
+TERMINAL_EVENTS = {"completed", "failed"}
+
+
+class Subscription:
+    """A single consumer of one request's progress events"""
+
+    def __init__(self, bus: "ProgressBus", request_id: str, buffer_size: int):
+        self.bus = bus
+        self.request_id = request_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class ProgressBus:
+    """Fan-out of progress events to subscribers, keyed by request_id"""
+
+    def __init__(self, buffer_size: int, max_tracked_requests: int):
+        self.buffer_size = buffer_size
+        self.max_tracked_requests = max_tracked_requests
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+
+    def publish(self, request_id: str, event: str, **data: Any) -> Dict[str, Any]:
+        """Publish an event to every subscriber of `request_id`"""
+        message = {
+            "request_id": request_id,
+            "event": event,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": data,
+        }
+
+        history = self._history.get(request_id)
+        if history is None:
+            history = deque(maxlen=self.buffer_size)
+            self._history[request_id] = history
+            while len(self._history) > self.max_tracked_requests:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(request_id)
+        history.append(message)
+
+        for subscription in self._subscribers.get(request_id, ()):
+            subscription.put(message)
+        return message
+
+    def subscribe(self, request_id: str) -> Subscription:
+        """Subscribe to a request, replaying any events already published"""
+        subscription = Subscription(self, request_id, self.buffer_size)
+        for message in self._history.get(request_id, ()):
+            subscription.put(message)
+        self._subscribers.setdefault(request_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.request_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.request_id]
+
+    def history(self, request_id: str) -> List[Dict[str, Any]]:
+        return list(self._history.get(request_id, ()))
+
+
+progress_bus = ProgressBus(
+    buffer_size=settings.progress_buffer_size,
+    max_tracked_requests=settings.progress_max_tracked_requests,
+)
@@ -0,0 +1,174 @@
+"""
+Embedded in-process executor
+
+Runs step functions directly in an asyncio worker pool inside the FastAPI
+process, as an alternative to Inngest for local throughput tests and
+single-box deployments. Handlers receive the event data and a step object
+with the same `run(step_id, handler, *args)` interface as `ctx.step`, so the
+same pipeline code runs under either executor.
+
+Jobs are kept in a durable SQLite queue (an EventOutbox): jobs are claimed
+atomically with a lease, which is renewed while the run executes, so
+executors in several processes sharing a queue never run the same job twice.
+Failed runs are retried with exponential backoff, and step results are
+memoised in memory so a retry skips the steps that already succeeded.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from core.queue.outbox import EventOutbox
+
+Handler = Callable[[Dict[str, Any], "LocalStep"], Awaitable[Any]]
+FailureHandler = Callable[[Dict[str, Any], Exception], Any]
+
+
+class LocalStep:
+    """Step runner with in-memory memoisation, mirroring Inngest's ctx.step.run"""
+
+    def __init__(self, memo: Dict[str, Any]):
+        self.memo = memo
+
+    async def run(self, step_id: str, handler: Callable[..., Awaitable[Any]], *handler_args: Any) -> Any:
+        if step_id in self.memo:
+            return self.memo[step_id]
+        result = await handler(*handler_args)
+        self.memo[step_id] = result
+        return result
+
+
+class LocalExecutor:
+    """Asyncio worker pool executing queued events with retries"""
+
+    def __init__(
+        self,
+        queue: EventOutbox,
+        handlers: Dict[str, Handler],
+        concurrency: int,
+        max_attempts: int,
+        lease_timeout: float,
+        on_failure: Optional[FailureHandler] = None,
+        poll_interval: float = 1.0,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease_timeout = lease_timeout
+        self.on_failure = on_failure
+        self.poll_interval = poll_interval
+
+        self._memo: Dict[int, Dict[str, Any]] = {}
+        self._running: Dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.stats = {"completed": 0, "retried": 0, "failed": 0}
+
+    async def submit(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Durably enqueue {"name", "data"} events
+
+        Usable as an OutboxFlusher sender; raises OutboxFullError when more
+        than max_backlog jobs are queued, which keeps events in the outbox.
+        """
+        self.queue.append_many([{"name": event["name"], "data": event["data"]} for event in events])
+
+    def start(self) -> None:
+        self._stopping = False
+        self._wakeup = self.queue.enable_wakeup()
+        self._task = asyncio.create_task(self._dispatch())
+        logger.info(
+            f"Local executor started with concurrency {self.concurrency}, "
+            f"{self.queue.backlog} queued jobs"
+        )
+
+    async def stop(self) -> None:
+        """Stop dispatching and cancel in-flight runs, which become due again immediately"""
+        self._stopping = True
+        if self._task is None:
+            return
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+        running = list(self._running.items())
+        for _, task in running:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in running), return_exceptions=True)
+        self.queue.defer([job_id for job_id, _ in running], 0)
+        self.queue.disable_wakeup()
+
+    async def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until the queue is drained (used by benchmarks and tests)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.backlog or self._running:
+            if deadline is not None and time.monotonic() > deadline:
+                raise asyncio.TimeoutError("Local executor did not drain in time")
+            await asyncio.sleep(0.005)
+
+    async def _dispatch(self) -> None:
+        last_renewal = time.monotonic()
+        while not self._stopping:
+            # Keep leases of long runs alive; if the process dies, its jobs
+            # become due again once their lease expires
+            if time.monotonic() - last_renewal >= self.lease_timeout / 3:
+                self.queue.defer(list(self._running), self.lease_timeout)
+                last_renewal = time.monotonic()
+
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                # Claimed jobs are leased in the same statement, so no other
+                # executor can take them between selecting and leasing
+                jobs = self.queue.claim_due(free, self.lease_timeout)
+                for job in jobs:
+                    self._running[job["id"]] = asyncio.create_task(self._run_job(job))
+                if len(jobs) == free:
+                    continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        memo = self._memo.setdefault(job_id, {})
+        try:
+            handler = self.handlers.get(job["name"])
+            if handler is None:
+                raise ValueError(f"No handler registered for event {job['name']}")
+
+            await handler(job["data"], LocalStep(memo))
+            self.queue.ack([job_id])
+            self._memo.pop(job_id, None)
+            self.stats["completed"] += 1
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            attempt = job["attempts"] + 1
+            if attempt >= self.max_attempts:
+                logger.error(f"Job {job_id} ({job['name']}) failed after {attempt} attempts: {e}")
+                self.queue.ack([job_id])
+                self._memo.pop(job_id, None)
+                self.stats["failed"] += 1
+                if self.on_failure:
+                    try:
+                        self.on_failure(job["data"], e)
+                    except Exception as hook_error:
+                        logger.error(f"Failure handler for job {job_id} raised: {hook_error}")
+            else:
+                logger.warning(f"Job {job_id} ({job['name']}) failed on attempt {attempt}, will retry: {e}")
+                self.queue.nack([job_id], str(e))
+                self.stats["retried"] += 1
+
+        finally:
+            self._running.pop(job_id, None)
+            if self._wakeup is not None:
+                self._wakeup.set()
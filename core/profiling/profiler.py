@@ -0,0 +1,222 @@
+"""
+On-demand profiling of pipeline runs
+
+A run is profiled when it was registered with `profile=True` (cProfile on
+every step plus tracemalloc snapshots around the marked sections), or, when
+`profile_slow_run_threshold` is set, its step timings are kept if the run
+turns out slower than the threshold or fails.
+
+When neither applies `start_run` returns None, no step wrapper is installed
+and `memory_snapshot` is a context-variable lookup, so profiling costs
+nothing when it is off.
+
+cProfile instruments the whole event loop thread while a step is running, so
+a profile can include coroutines of other requests that ran concurrently.
+It only sees that thread, though: work offloaded with `asyncio.to_thread`
+(the blocking Firecrawl map and scrape calls, search indexing) shows up as
+time spent awaiting, not as its own functions. Step timings and tracemalloc
+are process-wide and do include it.
+"""
+
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from core.config.settings import settings
+
+# Runs whose steps are still executing, kept across Inngest invocations
+_MAX_ACTIVE_RUNS = 100
+
+# Only one cProfile profiler can be enabled at a time
+_cprofile_lock = threading.Lock()
+
+# Profiled blocks currently using tracemalloc, and whether we turned it on
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+_current_run: ContextVar[Optional["RunProfile"]] = ContextVar("current_run_profile", default=None)
+
+
+class RunProfile:
+    """Profiling state for one request's pipeline run"""
+
+    def __init__(self, request_id: str, explicit: bool):
+        self.request_id = request_id
+        self.explicit = explicit
+        self.created_at = datetime.utcnow()
+        self.profiler = cProfile.Profile() if explicit else None
+        self.step_timings: Dict[str, float] = {}
+        self.memory: List[Dict[str, Any]] = []
+        self.cprofile_skipped: List[str] = []
+        self.error: Optional[str] = None
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.step_timings.values())
+
+    def summary(self, reason: str) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "reason": reason,
+            "created_at": self.created_at.isoformat(),
+            "total_seconds": self.total_seconds,
+            "step_timings": self.step_timings,
+            "memory": self.memory,
+            "has_cprofile": self.profiler is not None,
+            "cprofile_skipped_steps": self.cprofile_skipped,
+            "error": self.error,
+        }
+
+
+_active_runs: Dict[str, RunProfile] = {}
+
+
+def start_run(request_id: str, explicit: bool) -> Optional[RunProfile]:
+    """Profiling state for a run, or None when profiling is off for it"""
+    if not explicit and settings.profile_slow_run_threshold is None:
+        return None
+
+    run_profile = _active_runs.get(request_id)
+    if run_profile is None:
+        run_profile = RunProfile(request_id, explicit)
+        _active_runs[request_id] = run_profile
+        while len(_active_runs) > _MAX_ACTIVE_RUNS:
+            _active_runs.pop(next(iter(_active_runs)))
+    return run_profile
+
+
+def finish_run(run_profile: RunProfile, error: Optional[Exception] = None) -> Optional[Path]:
+    """
+    Store the profile if it was requested or the run was slow or failed, returning the summary path
+
+    Call this however the run ends, so failed runs are kept and don't linger
+    in the active runs.
+    """
+    _active_runs.pop(run_profile.request_id, None)
+    if error is not None:
+        run_profile.error = str(error)
+
+    threshold = settings.profile_slow_run_threshold
+    if run_profile.explicit:
+        reason = "requested"
+    elif threshold is not None and run_profile.total_seconds >= threshold:
+        reason = "slow_run"
+    elif error is not None:
+        reason = "failed"
+    else:
+        return None
+
+    summary_path = settings.profile_dir / f"{run_profile.request_id}.json"
+    try:
+        if run_profile.profiler is not None:
+            run_profile.profiler.dump_stats(str(settings.profile_dir / f"{run_profile.request_id}.prof"))
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(run_profile.summary(reason), f, indent=2)
+    except Exception as e:
+        logger.error(f"Failed to store profile for request_id {run_profile.request_id}: {e}")
+        return None
+
+    logger.info(
+        f"Stored {reason} profile for request_id {run_profile.request_id} "
+        f"({run_profile.total_seconds:.2f}s in steps)"
+    )
+    return summary_path
+
+
+class ProfilingStep:
+    """Wraps a step runner so each executed step is timed and, if requested, cProfiled"""
+
+    def __init__(self, step, run_profile: RunProfile):
+        self.step = step
+        self.run_profile = run_profile
+
+    async def run(self, step_id: str, handler: Callable[..., Awaitable[Any]], *handler_args: Any) -> Any:
+        run_profile = self.run_profile
+
+        async def profiled(*args: Any) -> Any:
+            token = _current_run.set(run_profile)
+            profiler = None
+            if run_profile.profiler is not None:
+                if _cprofile_lock.acquire(blocking=False):
+                    profiler = run_profile.profiler
+                else:
+                    run_profile.cprofile_skipped.append(step_id)
+
+            start = time.perf_counter()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return await handler(*args)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    _cprofile_lock.release()
+                run_profile.step_timings[step_id] = time.perf_counter() - start
+                _current_run.reset(token)
+
+        return await self.step.run(step_id, profiled, *handler_args)
+
+
+@contextmanager
+def memory_snapshot(label: str) -> Iterator[None]:
+    """Record tracemalloc allocation growth for the enclosed block of a profiled run"""
+    run_profile = _current_run.get()
+    if run_profile is None or not run_profile.explicit:
+        yield
+        return
+
+    global _tracemalloc_users, _tracemalloc_owned
+    if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracemalloc_owned = True
+    _tracemalloc_users += 1
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+        diff = after.compare_to(before, "lineno")
+        run_profile.memory.append({
+            "label": label,
+            "seconds": time.perf_counter() - start,
+            "size_diff_kb": sum(stat.size_diff for stat in diff) / 1024,
+            "peak_kb": peak / 1024,
+            "top_allocations": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_kb": stat.size_diff / 1024,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:10]
+            ],
+        })
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Summaries of stored profiles, newest first"""
+    summaries = []
+    for path in settings.profile_dir.glob("*.json"):
+        try:
+            with open(path, encoding="utf-8") as f:
+                summaries.append(json.load(f))
+        except Exception as e:
+            logger.warning(f"Skipping unreadable profile {path}: {e}")
+    summaries.sort(key=lambda summary: summary["created_at"], reverse=True)
+    return summaries
@@ -0,0 +1,285 @@
+"""
+Durable local event outbox
+
+Events are appended to a SQLite table running in WAL mode, so queuing a
+registration is a single local insert instead of a network round trip to
+Inngest. A background flusher drains the table in batches and retries failed
+sends with exponential backoff, so nothing is lost while Inngest is down.
+
+Rows are claimed atomically with a lease before they are sent, so several
+processes can share one outbox file without sending the same row at the same
+time. Delivery is still at-least-once (a crash between sending and acking
+resends the row), so consumers must deduplicate by event id.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from core.config.settings import settings
+
+
+class OutboxFullError(Exception):
+    """Raised when the outbox backlog is above the admission threshold"""
+
+    def __init__(self, backlog: int, retry_after: int):
+        super().__init__(f"Event outbox backlog ({backlog}) exceeds the configured limit")
+        self.backlog = backlog
+        self.retry_after = retry_after
+
+
+class EventOutbox:
+    """Append-only SQLite queue of events waiting to be delivered"""
+
+    def __init__(
+        self,
+        path: Path,
+        max_backlog: int,
+        backoff_base: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+    ):
+        self.path = path
+        self.max_backlog = max_backlog
+        self.backoff_base = backoff_base if backoff_base is not None else settings.outbox_flush_interval
+        self.max_backoff = max_backoff if max_backoff is not None else settings.outbox_max_backoff
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and keeps
+        # inserts well under a millisecond
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Wait for other processes' write transactions instead of failing
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                data TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt ON outbox (next_attempt_at, id)"
+        )
+        self._backlog = self.refresh_backlog()
+
+    @property
+    def backlog(self) -> int:
+        """Number of events not yet delivered"""
+        return self._backlog
+
+    def refresh_backlog(self) -> int:
+        """Recount pending events from disk (e.g. when several workers share the file)"""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()
+            self._backlog = count
+        return count
+
+    def append(self, name: str, data: Dict[str, Any]) -> int:
+        """
+        Durably queue an event for delivery
+
+        Raises OutboxFullError when the backlog is at or above max_backlog so
+        callers can shed load instead of queuing unbounded work.
+        """
+        if self._backlog >= self.max_backlog:
+            raise OutboxFullError(self._backlog, settings.outbox_retry_after)
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (name, data, created_at) VALUES (?, ?, ?)",
+                (name, json.dumps(data, default=str), time.time()),
+            )
+            self._backlog += 1
+
+        self.notify()
+        return cursor.lastrowid
+
+    def append_many(self, events: List[Dict[str, Any]]) -> None:
+        """Durably queue a batch of {"name", "data"} events in one transaction, all or nothing"""
+        if self._backlog + len(events) > self.max_backlog:
+            raise OutboxFullError(self._backlog, settings.outbox_retry_after)
+
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO outbox (name, data, created_at) VALUES (?, ?, ?)",
+                    [(event["name"], json.dumps(event["data"], default=str), now) for event in events],
+                )
+            self._backlog += len(events)
+
+        self.notify()
+
+    def claim_due(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Atomically take up to `limit` due events, oldest first
+
+        Claimed events are hidden from other callers (in this or another
+        process) for `lease_seconds`; ack or nack them before the lease runs
+        out, otherwise they become due again.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                UPDATE outbox SET next_attempt_at = ?
+                WHERE id IN (
+                    SELECT id FROM outbox WHERE next_attempt_at <= ? ORDER BY id LIMIT ?
+                )
+                RETURNING id, name, data, attempts
+                """,
+                (now + lease_seconds, now, limit),
+            ).fetchall()
+        rows.sort(key=lambda row: row[0])
+        return [
+            {"id": row[0], "name": row[1], "data": json.loads(row[2]), "attempts": row[3]}
+            for row in rows
+        ]
+
+    def ack(self, ids: List[int]) -> None:
+        """Remove delivered events"""
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM outbox WHERE id IN ({placeholders})", ids)
+            self._backlog = max(0, self._backlog - cursor.rowcount)
+
+    def nack(self, ids: List[int], error: str) -> None:
+        """Schedule failed events for another attempt with exponential backoff"""
+        if not ids:
+            return
+        now = time.time()
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._conn.execute(
+                f"""
+                UPDATE outbox
+                SET attempts = attempts + 1,
+                    last_error = ?,
+                    next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, 16)))
+                WHERE id IN ({placeholders})
+                """,
+                (error, now, self.max_backoff, self.backoff_base, *ids),
+            )
+
+    def defer(self, ids: List[int], seconds: float) -> None:
+        """Hide events from claim_due for `seconds` without counting an attempt (renews or releases a lease)"""
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE outbox SET next_attempt_at = ? WHERE id IN ({placeholders})",
+                (time.time() + seconds, *ids),
+            )
+
+    def enable_wakeup(self) -> asyncio.Event:
+        """Event set whenever something is appended, for the consumer to wait on"""
+        self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def disable_wakeup(self) -> None:
+        self._wakeup = None
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxFlusher:
+    """Background task that batch-sends outbox events"""
+
+    def __init__(
+        self,
+        outbox: EventOutbox,
+        sender: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        batch_size: int,
+        flush_interval: float,
+    ):
+        self.outbox = outbox
+        self.sender = sender
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._wakeup = self.outbox.enable_wakeup()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Outbox flusher started with {self.outbox.backlog} pending events")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task is None:
+            return
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        self.outbox.disable_wakeup()
+
+    async def flush_once(self) -> int:
+        """Send one batch of due events, returning how many were delivered"""
+        batch = self.outbox.claim_due(self.batch_size, settings.outbox_claim_lease)
+        if not batch:
+            return 0
+
+        ids = [event["id"] for event in batch]
+        try:
+            await self.sender(batch)
+        except Exception as e:
+            logger.warning(f"Failed to deliver {len(batch)} outbox events, will retry: {e}")
+            self.outbox.nack(ids, str(e))
+            return 0
+
+        self.outbox.ack(ids)
+        logger.info(f"Delivered {len(batch)} outbox events")
+        return len(batch)
+
+    async def _run(self) -> None:
+        wakeup = self._wakeup
+        while not self._stopping:
+            try:
+                delivered = await self.flush_once()
+            except Exception as e:
+                logger.error(f"Outbox flusher error: {e}")
+                delivered = 0
+
+            # Keep draining while full batches are going through
+            if delivered >= self.batch_size:
+                continue
+
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                self.outbox.refresh_backlog()
+
+        # Final best-effort drain on shutdown; anything left stays on disk
+        try:
+            await self.flush_once()
+        except Exception as e:
+            logger.warning(f"Outbox drain on shutdown failed: {e}")
+
+
+outbox = EventOutbox(settings.outbox_path, settings.outbox_max_backlog)
@@ -0,0 +1,199 @@
+"""
+Full-text search index over scraped website content
+
+Pages are stored in a SQLite FTS5 table alongside a small metadata table
+keyed by (request_id, url), so re-saving an analysis replaces its pages
+instead of duplicating them. Queries are ranked with BM25.
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from api.types import AnalysisOutput
+from core.config.settings import settings
+
+
+def _domain(url: Optional[str]) -> str:
+    """Normalise a URL to its bare host, e.g. https://www.linear.app/x -> linear.app"""
+    if not url:
+        return ""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _to_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query that matches documents containing every term
+
+    Each term is quoted so punctuation in user input ("SOC-2", "c++") can't
+    be parsed as FTS5 operators.
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of scraped pages"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Wait for other processes' writes (another worker, a backfill) instead of failing
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                request_id TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                url TEXT NOT NULL,
+                indexed_at TEXT NOT NULL,
+                UNIQUE (request_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_domain ON pages (domain);
+            CREATE TABLE IF NOT EXISTS analyses (
+                request_id TEXT PRIMARY KEY,
+                domain TEXT NOT NULL,
+                output_path TEXT,
+                indexed_at TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                content,
+                tokenize = 'porter unicode61'
+            );
+            """
+        )
+
+    def index_analysis(self, analysis_output: AnalysisOutput, output_path: Optional[str] = None) -> int:
+        """
+        Replace all indexed pages for the analysis' request_id, returning the page count
+
+        Also records where the analysis JSON was saved, so finished analyses
+        can be looked up by request_id.
+        """
+        request_id = analysis_output.request_id
+        domain = _domain(analysis_output.input_data.company_website)
+        indexed_at = analysis_output.timestamp.isoformat()
+
+        pages = [
+            (url, content)
+            for url, content in analysis_output.website_analysis.scraped_content.items()
+            # Failed scrapes are stored as "Error: ..." placeholders
+            if content and not content.startswith("Error: ")
+        ]
+
+        with self._lock:
+            # Take the write lock up front so busy_timeout applies, rather than
+            # failing when a read transaction tries to upgrade
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old_ids = [
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT id FROM pages WHERE request_id = ?", (request_id,)
+                    )
+                ]
+                if old_ids:
+                    self._conn.executemany(
+                        "DELETE FROM pages_fts WHERE rowid = ?", [(i,) for i in old_ids]
+                    )
+                    self._conn.execute("DELETE FROM pages WHERE request_id = ?", (request_id,))
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analyses (request_id, domain, output_path, indexed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (request_id, domain, output_path, indexed_at),
+                )
+                for url, content in pages:
+                    cursor = self._conn.execute(
+                        "INSERT INTO pages (request_id, domain, url, indexed_at) VALUES (?, ?, ?, ?)",
+                        (request_id, domain, url, indexed_at),
+                    )
+                    self._conn.execute(
+                        "INSERT INTO pages_fts (rowid, content) VALUES (?, ?)",
+                        (cursor.lastrowid, content),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return len(pages)
+
+    def output_path(self, request_id: str) -> Optional[str]:
+        """Path of the saved analysis JSON for request_id, if it has been indexed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output_path FROM analyses WHERE request_id = ?", (request_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def search(self, query: str, limit: int = 20, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the best matching pages with highlighted snippets, best first"""
+        match_query = _to_match_query(query)
+        if not match_query:
+            return []
+
+        sql = """
+            SELECT p.request_id, p.domain, p.url, p.indexed_at,
+                   snippet(pages_fts, 0, '**', '**', '...', 24),
+                   bm25(pages_fts)
+            FROM pages_fts
+            JOIN pages p ON p.id = pages_fts.rowid
+            WHERE pages_fts MATCH ?
+        """
+        params: List[Any] = [match_query]
+        if domain:
+            sql += " AND p.domain = ?"
+            params.append(_domain(domain if "://" in domain else f"https://{domain}"))
+        sql += " ORDER BY bm25(pages_fts) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "request_id": row[0],
+                "domain": row[1],
+                "url": row[2],
+                "indexed_at": row[3],
+                "snippet": row[4],
+                # bm25() is lower-is-better; flip it so higher scores rank first
+                "score": -row[5],
+            }
+            for row in rows
+        ]
+
+    def rebuild_from_outputs(self, output_dir: Path) -> int:
+        """Index every analysis JSON file in output_dir, returning the number of files"""
+        count = 0
+        for filepath in sorted(output_dir.glob("analysis_*.json")):
+            try:
+                with open(filepath, encoding="utf-8") as f:
+                    analysis_output = AnalysisOutput(**json.load(f))
+                self.index_analysis(analysis_output, str(filepath))
+                count += 1
+            except Exception as e:
+                logger.warning(f"Skipping {filepath} while rebuilding search index: {e}")
+        return count
+
+
+search_index = SearchIndex(settings.search_index_path)
+
+
+if __name__ == "__main__":
+    # Backfill the index from existing outputs: python -m core.search.index [output_dir]
+    output_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else settings.output_dir
+    indexed = search_index.rebuild_from_outputs(output_dir)
+    logger.info(f"Indexed {indexed} analysis files from {output_dir}")
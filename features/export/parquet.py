@@ -0,0 +1,388 @@
+"""
+Columnar export of analysis outputs
+
+Converts the analysis_*.json files in the output directory into two Hive
+partitioned Parquet datasets (date=YYYY-MM-DD/domain=...):
+
+- analyses: one row of metadata and counts per analysis
+- pages: one row per scraped page, holding the large markdown bodies
+
+Runs are incremental: a watermark of the last exported file's mtime is kept
+in the export directory, and files are processed in fixed-size batches so
+memory stays bounded however many outputs exist. Files that fail to parse
+are remembered in the watermark and retried on the next run.
+
+Re-saving an analysis bumps its mtime, so it is exported again. A ledger
+(request_id -> partition) lets each batch first rewrite the partitions
+holding older rows for the same request_ids, keeping one row per analysis.
+Every step of a batch is safe to repeat, so a crashed run is simply re-run.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from core.config.settings import settings
+
+WATERMARK_FILE = "_watermark.json"
+LEDGER_FILE = "_ledger.db"
+LOCK_FILE = "_export.lock"
+
+# Partition value for analyses without a company website
+NO_DOMAIN = "none"
+
+class ExportUnavailableError(RuntimeError):
+    """Raised when the optional pyarrow dependency is not installed"""
+
+
+class ExportInProgressError(RuntimeError):
+    """Raised when another export is already running"""
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportUnavailableError(
+            "pyarrow is required for exports, install it with: pip install pyarrow"
+        ) from e
+    return pa, pc, ds, pq
+
+
+def _schemas(pa):
+    analyses = pa.schema([
+        ("request_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("first_name", pa.string()),
+        ("last_name", pa.string()),
+        ("company_website", pa.string()),
+        ("linkedin", pa.string()),
+        ("linkedin_status", pa.string()),
+        ("discovered_url_count", pa.int32()),
+        ("filtered_url_count", pa.int32()),
+        ("scraped_page_count", pa.int32()),
+        ("error_count", pa.int32()),
+        ("filtering_logic", pa.string()),
+        ("source_file", pa.string()),
+        ("date", pa.string()),
+        ("domain", pa.string()),
+    ])
+    pages = pa.schema([
+        ("request_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("url", pa.string()),
+        ("is_error", pa.bool_()),
+        ("content_length", pa.int32()),
+        ("content", pa.large_string()),
+        ("date", pa.string()),
+        ("domain", pa.string()),
+    ])
+    return analyses, pages
+
+
+def _domain(url: Optional[str]) -> str:
+    if not url:
+        return NO_DOMAIN
+    host = urlparse(url).netloc.lower()
+    return (host[4:] if host.startswith("www.") else host) or NO_DOMAIN
+
+
+def _read_watermark(export_dir: Path) -> Tuple[Tuple[int, str], Set[str]]:
+    """Last exported (mtime_ns, name) and the names of files to retry"""
+    path = export_dir / WATERMARK_FILE
+    if not path.exists():
+        return (0, ""), set()
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return (data["mtime_ns"], data["name"]), set(data.get("retry", []))
+
+
+def _write_watermark(export_dir: Path, watermark: Tuple[int, str], retry: Set[str]) -> None:
+    path = export_dir / WATERMARK_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"mtime_ns": watermark[0], "name": watermark[1], "retry": sorted(retry)}, f)
+    tmp_path.replace(path)
+
+
+def _pending_files(
+    output_dir: Path, watermark: Tuple[int, str], retry: Set[str]
+) -> List[Tuple[Tuple[int, str], Path]]:
+    """Output files modified after the watermark or due for a retry, oldest first"""
+    pending = []
+    for filepath in output_dir.glob("analysis_*.json"):
+        key = (filepath.stat().st_mtime_ns, filepath.name)
+        if key > watermark or filepath.name in retry:
+            pending.append((key, filepath))
+    pending.sort()
+    return pending
+
+
+class _Ledger:
+    """Partition (date, domain) each exported request_id was last written to"""
+
+    def __init__(self, path: Path):
+        self._conn = sqlite3.connect(str(path), isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS exported ("
+            "request_id TEXT PRIMARY KEY, date TEXT NOT NULL, domain TEXT NOT NULL)"
+        )
+
+    def partitions(self, request_ids: Iterable[str]) -> Set[Tuple[str, str]]:
+        request_ids = list(request_ids)
+        found: Set[Tuple[str, str]] = set()
+        # Stay well under SQLite's bound parameter limit
+        for i in range(0, len(request_ids), 500):
+            chunk = request_ids[i:i + 500]
+            found.update(self._conn.execute(
+                f"SELECT date, domain FROM exported WHERE request_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall())
+        return found
+
+    def record(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO exported (request_id, date, domain) VALUES (?, ?, ?)",
+            [(row["request_id"], row["date"], row["domain"]) for row in rows],
+        )
+        self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _rows(filepath: Path) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Flatten one analysis file into an analyses row and its page rows"""
+    with open(filepath, encoding="utf-8") as f:
+        record = json.load(f)
+
+    input_data = record.get("input_data") or {}
+    website = record.get("website_analysis") or {}
+    linkedin = record.get("linkedin_analysis") or {}
+    scraped = website.get("scraped_content") or {}
+
+    timestamp = datetime.fromisoformat(record["timestamp"])
+    date = timestamp.date().isoformat()
+    domain = _domain(input_data.get("company_website"))
+
+    analysis_row = {
+        "request_id": record["request_id"],
+        "timestamp": timestamp,
+        "first_name": input_data.get("first_name"),
+        "last_name": input_data.get("last_name"),
+        "company_website": input_data.get("company_website"),
+        "linkedin": input_data.get("linkedin"),
+        "linkedin_status": linkedin.get("status"),
+        "discovered_url_count": len(website.get("discovered_urls") or []),
+        "filtered_url_count": len(website.get("filtered_urls") or []),
+        "scraped_page_count": len(scraped),
+        "error_count": len(website.get("errors") or []),
+        "filtering_logic": website.get("filtering_logic"),
+        "source_file": filepath.name,
+        "date": date,
+        "domain": domain,
+    }
+    page_rows = (
+        {
+            "request_id": record["request_id"],
+            "timestamp": timestamp,
+            "url": url,
+            "is_error": content.startswith("Error: "),
+            "content_length": len(content),
+            "content": content,
+            "date": date,
+            "domain": domain,
+        }
+        for url, content in scraped.items()
+    )
+    return analysis_row, page_rows
+
+
+def _remove_rows(
+    pa, pc, ds, pq, base_dir: Path, partitions: Set[Tuple[str, str]], request_ids: List[str]
+) -> int:
+    """
+    Drop rows for request_ids from the given partitions, returning rows removed
+
+    Each affected file is rewritten next to itself and atomically swapped in,
+    so a crash leaves either the old or the new file, never half of one.
+    """
+    if not partitions or not base_dir.exists():
+        return 0
+
+    dataset = ds.dataset(base_dir, format="parquet", partitioning="hive")
+    partition_filter = None
+    for date, domain in partitions:
+        condition = (ds.field("date") == date) & (ds.field("domain") == domain)
+        partition_filter = condition if partition_filter is None else partition_filter | condition
+
+    removed = 0
+    for fragment in dataset.get_fragments(filter=partition_filter):
+        # Partition columns live in the directory names, not in the file
+        table = pq.read_table(fragment.path, partitioning=None)
+        keep = pc.invert(pc.is_in(table["request_id"], value_set=pa.array(request_ids, pa.string())))
+        kept = table.filter(keep)
+        if kept.num_rows == table.num_rows:
+            continue
+
+        removed += table.num_rows - kept.num_rows
+        if kept.num_rows:
+            # Dot-prefixed files are ignored by dataset discovery if a crash leaves one behind
+            path = Path(fragment.path)
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            pq.write_table(kept, tmp_path)
+            os.replace(tmp_path, path)
+        else:
+            os.remove(fragment.path)
+    return removed
+
+
+def _write_batch(pa, ds, schema, rows: List[Dict[str, Any]], base_dir: Path, basename: str) -> None:
+    if not rows:
+        return
+    table = pa.Table.from_pylist(rows, schema=schema)
+    ds.write_dataset(
+        table,
+        base_dir,
+        format="parquet",
+        partitioning=["date", "domain"],
+        partitioning_flavor="hive",
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export_analyses(
+    output_dir: Optional[Path] = None,
+    export_dir: Optional[Path] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Export analyses written since the last run to Parquet
+
+    Returns counts of files read, analyses and pages written, analyses that
+    replaced an earlier export, and the new watermark. Raises ExportUnavailableError without pyarrow and
+    ExportInProgressError if another export is running.
+    """
+    pa, pc, ds, pq = _import_pyarrow()
+    analyses_schema, pages_schema = _schemas(pa)
+
+    output_dir = output_dir or settings.output_dir
+    export_dir = export_dir or settings.export_dir
+    batch_size = batch_size or settings.export_batch_size
+
+    # Only one export may write to the export directory at a time, whether it
+    # runs in the server or from the CLI. flock locks belong to the open file,
+    # so this also excludes a second export within the same process.
+    export_dir.mkdir(parents=True, exist_ok=True)
+    lock_file = open(export_dir / LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise ExportInProgressError("An export is already running")
+
+    try:
+        start = time.perf_counter()
+        run_id = uuid.uuid4().hex[:12]
+        watermark, retry = _read_watermark(export_dir)
+        pending = _pending_files(output_dir, watermark, retry)
+        # Retries for files that no longer exist are dropped
+        retry &= {filepath.name for _, filepath in pending}
+        ledger = _Ledger(export_dir / LEDGER_FILE)
+
+        stats = {
+            "files_scanned": len(pending),
+            "analyses_exported": 0,
+            "analyses_replaced": 0,
+            "pages_exported": 0,
+            "files_skipped": 0,
+        }
+        # Keyed by request_id so a batch holds one version of each analysis
+        analysis_rows: Dict[str, Dict[str, Any]] = {}
+        page_rows: Dict[str, List[Dict[str, Any]]] = {}
+        batch_number = 0
+
+        def flush(last_key: Tuple[int, str]) -> None:
+            nonlocal analysis_rows, page_rows, batch_number, watermark
+            request_ids = list(analysis_rows)
+            if request_ids:
+                # Remove earlier exports of these analyses before writing the new rows
+                partitions = ledger.partitions(request_ids)
+                stats["analyses_replaced"] += _remove_rows(
+                    pa, pc, ds, pq, export_dir / "analyses", partitions, request_ids
+                )
+                _remove_rows(pa, pc, ds, pq, export_dir / "pages", partitions, request_ids)
+                ledger.record(analysis_rows.values())
+
+            basename = f"part-{run_id}-{batch_number:05d}"
+            pages = [row for rows in page_rows.values() for row in rows]
+            _write_batch(pa, ds, analyses_schema, list(analysis_rows.values()), export_dir / "analyses", basename)
+            _write_batch(pa, ds, pages_schema, pages, export_dir / "pages", basename)
+            # Only advance the watermark once the batch is on disk; retried
+            # files sort before it and must not move it backwards
+            watermark = max(watermark, last_key)
+            _write_watermark(export_dir, watermark, retry)
+            stats["analyses_exported"] += len(analysis_rows)
+            stats["pages_exported"] += len(pages)
+            analysis_rows, page_rows = {}, {}
+            batch_number += 1
+
+        files_in_batch = 0
+        try:
+            for key, filepath in pending:
+                try:
+                    analysis_row, pages = _rows(filepath)
+                    analysis_rows[analysis_row["request_id"]] = analysis_row
+                    page_rows[analysis_row["request_id"]] = list(pages)
+                    retry.discard(filepath.name)
+                except Exception as e:
+                    logger.warning(f"Skipping {filepath} during export, will retry next run: {e}")
+                    stats["files_skipped"] += 1
+                    retry.add(filepath.name)
+
+                files_in_batch += 1
+                if files_in_batch >= batch_size:
+                    flush(key)
+                    files_in_batch = 0
+
+            if files_in_batch:
+                flush(pending[-1][0])
+        finally:
+            ledger.close()
+
+        stats["watermark"] = watermark[1] or None
+        stats["took_ms"] = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Exported {stats['analyses_exported']} analyses and {stats['pages_exported']} pages to {export_dir}"
+        )
+        return stats
+    finally:
+        # Closing the file releases the lock
+        lock_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export analysis outputs to partitioned Parquet datasets")
+    parser.add_argument("--output-dir", type=Path, default=settings.output_dir)
+    parser.add_argument("--export-dir", type=Path, default=settings.export_dir)
+    parser.add_argument("--batch-size", type=int, default=settings.export_batch_size)
+    args = parser.parse_args()
+
+    result = export_analyses(args.output_dir, args.export_dir, args.batch_size)
+    print(json.dumps(result, indent=2))
@@ -1,13 +1,23 @@
+import asyncio
+import ipaddress
 import json
+import socket
 import uuid
 from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse
 from loguru import logger
 from pathlib import Path
+import httpx
 import inngest
 
-from api.types import AnalysisOutput, LinkedInAnalysis, RegisterRequest, WebsiteAnalysis
+from api.types import AnalysisOutput, AnalysisProgressEvent, LinkedInAnalysis, RegisterRequest, WebsiteAnalysis
 from core.clients.firecrawl import FirecrawlClient
 from core.config.settings import settings
+from core.events.bus import progress_bus
+from core.profiling.profiler import ProfilingStep, finish_run, memory_snapshot, start_run
+from core.search.index import search_index
+from core.queue.outbox import outbox
 from features.extraction.linkedin_analysis import get_linkedin_implementation_plan
 
 
@@ -19,91 +29,253 @@ inngest_client = inngest.Inngest(
     logger=logger.bind(name="inngest"),
 )
 
+# Callback deliveries running in the background, kept so they aren't garbage collected
+_callback_tasks: set[asyncio.Task] = set()
+
+
+# Inngest calls this once process-registration has exhausted its retries.
+# ctx.event is "inngest/function.failed", wrapping the original event and error.
+async def on_registration_failed(ctx: inngest.Context) -> None:
+    original_event = ctx.event.data.get("event") or {}
+    error = ctx.event.data.get("error") or {}
+    handle_registration_failure(
+        original_event.get("data") or {},
+        Exception(error.get("message", "process-registration failed"))
+    )
+
+
 # Inngest function to process registration
 @inngest_client.create_function(
     fn_id="process-registration",
-    trigger=inngest.TriggerEvent(event="registration.submitted")
+    trigger=inngest.TriggerEvent(event="registration.submitted"),
+    on_failure=on_registration_failed
 )
 async def process_registration(ctx: inngest.Context):
-    logger.info(f"Processing registration: {ctx.event.data}")
+    return await run_registration(ctx.event.data, ctx.step)
+
+
+# Registration pipeline, shared by the Inngest function and the local executor.
+# `step` is anything with Inngest's `run(step_id, handler, *args)` interface.
+async def run_registration(request_data: dict, step) -> dict:
+    logger.info(f"Processing registration: {request_data}")
 
-    request_data = ctx.event.data
     request_id = request_data.get("request_id")
     timestamp = datetime.fromisoformat(request_data.get("timestamp"))
     register_request = RegisterRequest(**request_data.get("input_data"))
 
+    # None unless this run was asked to be profiled or slow-run capture is on
+    run_profile = start_run(request_id, register_request.profile)
+    if run_profile:
+        step = ProfilingStep(step, run_profile)
+
     linkedin_analysis = LinkedInAnalysis(
         status="not_implemented",
         implementation_plan=get_linkedin_implementation_plan()
     )
     website_analysis = WebsiteAnalysis()
 
-    if register_request.company_website:
-        website_analysis_data = await ctx.step.run(
-            "analyze-website",
-            analyze_website,
-            register_request.company_website
+    # Inngest's step interrupts are BaseExceptions and pass through untouched
+    try:
+        if register_request.company_website:
+            website_analysis_data = await step.run(
+                "analyze-website",
+                analyze_website,
+                register_request.company_website,
+                request_id
+            )
+            # Convert back to Pydantic if needed
+            website_analysis = WebsiteAnalysis(**website_analysis_data)
+        analysis_output = AnalysisOutput(
+            request_id=request_id,
+            timestamp=timestamp,
+            input_data=register_request,
+            linkedin_analysis=linkedin_analysis,
+            website_analysis=website_analysis
         )
-        # Convert back to Pydantic if needed
-        website_analysis = WebsiteAnalysis(**website_analysis_data)
-    analysis_output = AnalysisOutput(
-        request_id=request_id,
-        timestamp=timestamp,
-        input_data=register_request,
-        linkedin_analysis=linkedin_analysis,
-        website_analysis=website_analysis
-    )
 
-    await ctx.step.run("save-analysis", save_analysis_output, analysis_output)
+        output_path = await step.run("save-analysis", save_analysis_output, analysis_output)
+    except Exception as e:
+        if run_profile:
+            finish_run(run_profile, error=e)
+        raise
+
+    if run_profile:
+        finish_run(run_profile)
+
+    progress_bus.publish(request_id, "completed", path=output_path)
+
+    # The analysis is finished at this point; the webhook is best-effort and
+    # its failures must not fail (or retry) the run
+    if register_request.callback_url:
+        schedule_callback(register_request.callback_url, request_id, "completed", path=output_path)
+
     logger.info(f"Completed processing for request_id: {request_id}")
     return {"status": "completed", "request_id": request_id}
 
 
+# Local executor hook for runs that exhausted their retries
+def handle_registration_failure(request_data: dict, error: Exception) -> None:
+    request_id = request_data.get("request_id")
+    progress_bus.publish(request_id, "failed", message=str(error))
+
+    callback_url = (request_data.get("input_data") or {}).get("callback_url")
+    if callback_url:
+        schedule_callback(callback_url, request_id, "failed", message=str(error))
+
+
 # Website analysis helper
-async def analyze_website(website_url: str) -> dict:
+async def analyze_website(website_url: str, request_id: Optional[str] = None) -> dict:
     logger.info(f"Starting website analysis for: {website_url}")
     firecrawl = FirecrawlClient()
     analysis = WebsiteAnalysis()
 
+    def on_page_scraped(url: str, index: int, total: int, error: Optional[str]) -> None:
+        if request_id:
+            progress_bus.publish(
+                request_id, "page_scraped", url=url, index=index, total=total, error=error
+            )
+
     try:
         discovered_urls = await firecrawl.discover_urls(website_url)
         analysis.discovered_urls = discovered_urls
+        if request_id:
+            progress_bus.publish(request_id, "urls_discovered", count=len(discovered_urls))
 
         filtered_urls = firecrawl.filter_valuable_urls(discovered_urls)
         analysis.filtered_urls = filtered_urls
         analysis.filtering_logic = (
             f"Filtered {len(discovered_urls)} URLs to {len(filtered_urls)} high-value URLs"
         )
+        if request_id:
+            progress_bus.publish(request_id, "urls_filtered", count=len(filtered_urls))
 
         if filtered_urls:
-            scraped_content = await firecrawl.scrape_multiple_urls(filtered_urls)
+            with memory_snapshot("scrape_multiple_urls"):
+                scraped_content = await firecrawl.scrape_multiple_urls(filtered_urls, on_page_scraped)
             analysis.scraped_content = scraped_content
 
     except Exception as e:
         error_msg = f"Error analyzing website {website_url}: {str(e)}"
         logger.error(error_msg)
         analysis.errors.append(error_msg)
+        if request_id:
+            progress_bus.publish(request_id, "error", message=error_msg)
 
     # Convert Pydantic model to dict for JSON serialization
     return analysis.model_dump() 
 
 
 
-# Save analysis output to JSON
-async def save_analysis_output(analysis_output: AnalysisOutput) -> None:
+# Save analysis output to JSON, returning the path written
+async def save_analysis_output(analysis_output: AnalysisOutput) -> str:
     timestamp_str = analysis_output.timestamp.strftime("%Y%m%d_%H%M%S")
     filename = f"analysis_{timestamp_str}.json"
     filepath = settings.output_dir / filename
 
     try:
-        output_dict = analysis_output.model_dump()  # Pydantic v2
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(output_dict, f, indent=2, default=str, ensure_ascii=False)
+        with memory_snapshot("save_analysis_output"):
+            output_dict = analysis_output.model_dump()  # Pydantic v2
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(output_dict, f, indent=2, default=str, ensure_ascii=False)
         logger.info(f"Analysis saved to: {filepath}")
     except Exception as e:
         logger.error(f"Failed to save analysis output: {e}")
+        progress_bus.publish(analysis_output.request_id, "error", message=f"Failed to save analysis output: {e}")
         raise
 
+    # The JSON file is the source of truth; a failed index update is logged, not fatal
+    try:
+        indexed = await asyncio.to_thread(search_index.index_analysis, analysis_output, str(filepath))
+        logger.info(f"Indexed {indexed} pages for request_id: {analysis_output.request_id}")
+    except Exception as e:
+        logger.error(f"Failed to update search index: {e}")
+
+    progress_bus.publish(analysis_output.request_id, "saved", path=str(filepath))
+    return str(filepath)
+
+
+# Resolve the callback host once and refuse loopback, private or otherwise
+# non-public addresses. Returns the URL rewritten to the checked address plus
+# the Host header and TLS server name to send, so the request connects to
+# exactly the address that was checked (a second lookup could be rebound).
+async def _pin_callback_host(callback_url: str) -> tuple[str, str, str]:
+    parsed = urlparse(callback_url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    loop = asyncio.get_running_loop()
+    addresses = await loop.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+
+    ips = [ipaddress.ip_address(sockaddr[0]) for *_, sockaddr in addresses]
+    if not settings.callback_allow_private_hosts:
+        for ip in ips:
+            if not ip.is_global:
+                raise ValueError(f"callback host {parsed.hostname} resolves to non-public address {ip}")
+
+    ip = ips[0]
+    host = f"[{ip}]" if ip.version == 6 else str(ip)
+    pinned_url = parsed._replace(netloc=f"{host}:{port}").geturl()
+    host_header = parsed.hostname if parsed.port is None else f"{parsed.hostname}:{parsed.port}"
+    return pinned_url, host_header, parsed.hostname
+
+
+# Deliver a progress event to the client's webhook in the background,
+# keeping a reference to the task until it finishes
+def schedule_callback(callback_url: str, request_id: str, event: str, **data) -> None:
+    task = asyncio.create_task(notify_callback(callback_url, request_id, event, **data))
+    _callback_tasks.add(task)
+    task.add_done_callback(_callback_tasks.discard)
+
+
+# Push a completed or failed event to the client's webhook, retrying with
+# backoff. Never raises: a broken webhook doesn't affect the analysis.
+async def notify_callback(callback_url: str, request_id: str, event: str, **data) -> bool:
+    message = AnalysisProgressEvent(
+        request_id=request_id,
+        event=event,
+        timestamp=datetime.utcnow(),
+        data=data
+    )
+
+    try:
+        pinned_url, host_header, server_name = await _pin_callback_host(callback_url)
+    except Exception as e:
+        logger.warning(f"Not notifying callback for request_id {request_id}: {e}")
+        return False
+
+    for attempt in range(1, settings.callback_max_attempts + 1):
+        try:
+            async with httpx.AsyncClient(timeout=settings.callback_timeout, follow_redirects=False) as client:
+                response = await client.post(
+                    pinned_url,
+                    content=message.model_dump_json(),
+                    headers={"Content-Type": "application/json", "Host": host_header},
+                    # Verify the certificate against the original host name
+                    extensions={"sni_hostname": server_name},
+                )
+                response.raise_for_status()
+            logger.info(f"Notified callback for request_id: {request_id}")
+            return True
+        except Exception as e:
+            logger.warning(
+                f"Callback attempt {attempt}/{settings.callback_max_attempts} "
+                f"for request_id {request_id} failed: {e}"
+            )
+            if attempt < settings.callback_max_attempts:
+                await asyncio.sleep(settings.callback_retry_backoff * 2 ** (attempt - 1))
+
+    logger.error(f"Giving up on callback for request_id: {request_id}")
+    return False
+
+
+# Deliver queued outbox events to Inngest in a single batch. The outbox may
+# resend an event after a crash, so the request_id doubles as the event id
+# and Inngest drops the duplicate.
+async def send_events(events: list[dict]) -> list[str]:
+    batch = [
+        inngest.Event(id=event["data"]["request_id"], name=event["name"], data=event["data"])
+        for event in events
+    ]
+    return await inngest_client.send(batch)
+
 
 # Trigger the analysis programmatically
 async def trigger_analysis(register_request: RegisterRequest) -> str:
@@ -113,20 +285,19 @@ async def trigger_analysis(register_request: RegisterRequest) -> str:
     # Convert Pydantic model to dict
     input_data = register_request.model_dump()
 
-    # Wrap data in an Inngest.Event
-    event = inngest.Event(
-        name="registration.submitted",
-        data={
+    logger.info(f"Triggering analysis for: {register_request.first_name} {register_request.last_name}")
+
+    # Queue in the local outbox; the flusher delivers it to the configured executor.
+    # Raises OutboxFullError when the backlog is too large.
+    outbox.append(
+        "registration.submitted",
+        {
             "request_id": request_id,
             "timestamp": timestamp.isoformat(),
             "input_data": input_data
         }
     )
 
-    logger.info(f"Triggering analysis for: {register_request.first_name} {register_request.last_name}")
-
-    # Send asynchronously
-    ids = await inngest_client.send(event)
-
-    logger.info(f"Triggered analysis for request_id: {request_id}, Event IDs: {ids}")
+    progress_bus.publish(request_id, "queued")
+    logger.info(f"Queued analysis for request_id: {request_id}")
     return request_id
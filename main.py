@@ -1,28 +1,85 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 import inngest
 import inngest.fast_api
 
-from api.routers import health, register
-from features.extraction.processor import inngest_client, process_registration
+from api.routers import admin, analyses, export, health, register, search
+from core.config.settings import settings
+from core.executor.local import LocalExecutor
+from core.queue.outbox import EventOutbox, OutboxFlusher, outbox
+from features.extraction.processor import (
+    handle_registration_failure,
+    inngest_client,
+    process_registration,
+    run_registration,
+    send_events,
+)
+
+
+def create_local_executor() -> LocalExecutor:
+    """Executor running the registration pipeline inside this process"""
+    return LocalExecutor(
+        EventOutbox(
+            settings.local_executor_queue_path,
+            settings.local_executor_max_queued,
+            backoff_base=settings.local_executor_retry_backoff,
+        ),
+        handlers={"registration.submitted": run_registration},
+        concurrency=settings.local_executor_concurrency,
+        max_attempts=settings.local_executor_max_attempts,
+        lease_timeout=settings.local_executor_lease_timeout,
+        on_failure=handle_registration_failure,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Deliver queued registration events to the configured executor in the background
+    executor = None
+    sender = send_events
+    if settings.executor == "local":
+        executor = create_local_executor()
+        executor.start()
+        sender = executor.submit
+
+    flusher = OutboxFlusher(
+        outbox,
+        sender,
+        batch_size=settings.outbox_batch_size,
+        flush_interval=settings.outbox_flush_interval,
+    )
+    flusher.start()
+    yield
+    await flusher.stop()
+    if executor is not None:
+        await executor.stop()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Astral Assessment API",
     description="AI-powered business intelligence pipeline",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Include your API routers
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(register.router, tags=["registration"])
+app.include_router(analyses.router, tags=["analyses"])
+app.include_router(search.router, tags=["search"])
+app.include_router(export.router, prefix="/exports", tags=["export"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 # Serve Inngest functions as webhook routes
-inngest.fast_api.serve(
-    app,
-    inngest_client,
-    functions=[process_registration]  # your existing Inngest function
-)
+if settings.executor == "inngest":
+    inngest.fast_api.serve(
+        app,
+        inngest_client,
+        functions=[process_registration]  # your existing Inngest function
+    )
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
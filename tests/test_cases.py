@@ -1,11 +1,88 @@
+import asyncio
+import fcntl
+import json
+import os
+import pstats
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
 import pytest
 import httpx
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from pathlib import Path
 
+from api.routers import analyses
+from api.types import AnalysisOutput, LinkedInAnalysis, RegisterRequest, WebsiteAnalysis
+from core.config.settings import settings
+from core.events.bus import progress_bus
+from core.executor.local import LocalExecutor, LocalStep
+from core.profiling import profiler
+from core.queue.outbox import EventOutbox, OutboxFullError
+from core.search.index import SearchIndex
+from features.export.parquet import ExportInProgressError, export_analyses
+from features.extraction import processor
+from main import app
+
 BASE_URL = "http://localhost:8000"
 
 
+@pytest.fixture
+def isolated_pipeline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Run the pipeline against a temporary output directory and search index"""
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    monkeypatch.setattr(settings, "output_dir", output_dir)
+    monkeypatch.setattr(settings, "callback_retry_backoff", 0.01)
+    monkeypatch.setattr(processor, "search_index", SearchIndex(tmp_path / "search.db"))
+    return output_dir
+
+
+@pytest.fixture
+def callback_server():
+    """Local webhook receiver; yields [port, received JSON bodies]"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            received.append(json.loads(self.rfile.read(length)))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield [server.server_port, received]
+    server.shutdown()
+
+
+def _registration_event(request_id: str, callback_url: Optional[str] = None) -> dict:
+    """Event data as queued by trigger_analysis, for a LinkedIn-only prospect"""
+    return {
+        "request_id": request_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "input_data": {
+            "first_name": "Test",
+            "last_name": "Prospect",
+            "linkedin": "https://www.linkedin.com/in/testprospect",
+            "callback_url": callback_url,
+        },
+    }
+
+
+@pytest.fixture
+def small_outbox(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> EventOutbox:
+    """An outbox on a temporary file that admits only two events"""
+    test_outbox = EventOutbox(tmp_path / "outbox.db", max_backlog=2)
+    monkeypatch.setattr(processor, "outbox", test_outbox)
+    return test_outbox
+
+
 @pytest.fixture
 async def client() -> AsyncGenerator[httpx.AsyncClient, None]:
     """Create an async HTTP client for testing"""
@@ -34,6 +111,8 @@ async def test_detailed_health_check(client: httpx.AsyncClient):
     assert "uptime_seconds" in data
     assert "services" in data
     assert "version" in data
+    assert data["executor"] in ("inngest", "local")
+    assert "executor" not in data["services"]
     print(f"Detailed Health: {response.status_code} - Services: {data['services']}")
 
 
@@ -159,6 +238,528 @@ async def test_invalid_website_url(client: httpx.AsyncClient):
     print(f"Invalid URL Test: {response.status_code} - Handled gracefully")
 
 
+@pytest.mark.asyncio
+async def test_callback_delivered_after_completion(isolated_pipeline: Path, callback_server: list, monkeypatch: pytest.MonkeyPatch):
+    """Test that a finished run publishes completed and then POSTs it to the webhook"""
+    monkeypatch.setattr(settings, "callback_allow_private_hosts", True)
+    request_id = str(uuid.uuid4())
+    request_data = _registration_event(request_id, callback_url=f"http://127.0.0.1:{callback_server[0]}/hook")
+
+    result = await processor.run_registration(request_data, LocalStep({}))
+    await asyncio.gather(*processor._callback_tasks)
+
+    assert result["status"] == "completed"
+    events = [message["event"] for message in progress_bus.history(request_id)]
+    assert events[-2:] == ["saved", "completed"]
+    assert len(callback_server[1]) == 1
+    assert callback_server[1][0]["request_id"] == request_id
+    assert callback_server[1][0]["event"] == "completed"
+    print(f"Callback Delivery Test: {events}")
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_does_not_fail_run(isolated_pipeline: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that an unreachable webhook leaves the finished analysis completed"""
+    monkeypatch.setattr(settings, "callback_allow_private_hosts", True)
+    request_id = str(uuid.uuid4())
+    request_data = _registration_event(request_id, callback_url="http://127.0.0.1:9/hook")
+
+    result = await processor.run_registration(request_data, LocalStep({}))
+    delivered = await asyncio.gather(*processor._callback_tasks)
+
+    assert result["status"] == "completed"
+    assert delivered == [False]
+    events = [message["event"] for message in progress_bus.history(request_id)]
+    assert events[-1] == "completed"
+    assert "failed" not in events
+    assert len(list(isolated_pipeline.glob("analysis_*.json"))) == 1
+    print(f"Failing Callback Test: {events}")
+
+
+@pytest.mark.asyncio
+async def test_callback_notified_when_run_fails(callback_server: list, monkeypatch: pytest.MonkeyPatch):
+    """Test that a run that exhausted its retries POSTs a failed event to its webhook"""
+    monkeypatch.setattr(settings, "callback_allow_private_hosts", True)
+    request_id = str(uuid.uuid4())
+    request_data = _registration_event(request_id, callback_url=f"http://localhost:{callback_server[0]}/hook")
+
+    processor.handle_registration_failure(request_data, RuntimeError("scrape exploded"))
+    delivered = await asyncio.gather(*processor._callback_tasks)
+
+    assert delivered == [True]
+    assert progress_bus.history(request_id)[-1]["event"] == "failed"
+    assert callback_server[1][0]["event"] == "failed"
+    assert callback_server[1][0]["data"] == {"message": "scrape exploded"}
+    print(f"Failure Callback Test: {callback_server[1][0]['event']}")
+
+
+@pytest.mark.asyncio
+async def test_callback_connects_to_checked_address(monkeypatch: pytest.MonkeyPatch):
+    """Test that the webhook is sent to the address resolved for the host check, with the original Host header"""
+    monkeypatch.setattr(settings, "callback_allow_private_hosts", True)
+    seen_hosts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            seen_hosts.append(self.headers["Host"])
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        pinned_url, host_header, server_name = await processor._pin_callback_host(
+            f"http://localhost:{server.server_port}/hook"
+        )
+        delivered = await processor.notify_callback(
+            f"http://localhost:{server.server_port}/hook", "pinned", "completed"
+        )
+    finally:
+        server.shutdown()
+
+    assert pinned_url.startswith(("http://127.0.0.1:", "http://[::1]:"))
+    assert host_header == f"localhost:{server.server_port}"
+    assert server_name == "localhost"
+    assert delivered is True
+    assert seen_hosts == [f"localhost:{server.server_port}"]
+    print(f"Pinned Callback Test: {pinned_url}")
+
+
+@pytest.mark.asyncio
+async def test_callback_to_private_host_is_not_sent(isolated_pipeline: Path, callback_server: list):
+    """Test that webhooks resolving to loopback addresses are refused at send time"""
+    delivered = await processor.notify_callback(
+        f"http://localhost:{callback_server[0]}/hook", "private-host", "completed", path="analysis.json"
+    )
+    assert delivered is False
+    assert callback_server[1] == []
+    print("Private Callback Host Test: webhook refused")
+
+
+@pytest.mark.asyncio
+async def test_validation_failure_loopback_callback_url(client: httpx.AsyncClient):
+    """Test validation failure when callback_url points at a loopback address"""
+    payload = {
+        "first_name": "Loopback",
+        "last_name": "Callback",
+        "linkedin": "https://www.linkedin.com/in/loopback",
+        "callback_url": "http://127.0.0.1:9/hook",
+    }
+    response = await client.post("/register", json=payload)
+    assert response.status_code == 422
+    print(f"Loopback Callback Test: {response.status_code} - Expected validation error")
+
+
+@pytest.mark.asyncio
+async def test_events_for_unknown_request_not_found():
+    """Test that the progress stream 404s instead of hanging for unknown request_ids"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        response = await asgi_client.get(f"/analyses/{uuid.uuid4()}/events")
+    assert response.status_code == 404
+    print(f"Unknown Stream Test: {response.status_code} - Expected not found")
+
+
+@pytest.mark.asyncio
+async def test_events_for_finished_request_not_in_history(isolated_pipeline: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that a saved analysis without bus history gets a single completed event"""
+    request_id = str(uuid.uuid4())
+    await processor.run_registration(_registration_event(request_id), LocalStep({}))
+    progress_bus._history.pop(request_id)
+    monkeypatch.setattr(analyses, "search_index", processor.search_index)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        response = await asgi_client.get(f"/analyses/{request_id}/events")
+    assert response.status_code == 200
+    assert response.text.startswith("event: completed")
+    print(f"Finished Stream Test: {response.status_code} - completed replayed from saved output")
+
+
+@pytest.mark.asyncio
+async def test_validation_failure_invalid_callback_url(client: httpx.AsyncClient):
+    """Test validation failure when callback_url is not an http(s) URL"""
+    payload = {
+        "first_name": "Invalid",
+        "last_name": "Callback",
+        "linkedin": "https://www.linkedin.com/in/invalid",
+        "callback_url": "ftp://example.com/hook",
+    }
+    response = await client.post("/register", json=payload)
+    assert response.status_code == 422
+    print(f"Invalid Callback Test: {response.status_code} - Expected validation error")
+
+
+def _analysis_output(request_id: str, website: Optional[str], scraped_content: dict) -> AnalysisOutput:
+    """Saved analysis for a prospect whose website scrape produced scraped_content"""
+    return AnalysisOutput(
+        request_id=request_id,
+        timestamp=datetime.utcnow(),
+        input_data=RegisterRequest(
+            first_name="Test",
+            last_name="Prospect",
+            company_website=website,
+            linkedin="https://www.linkedin.com/in/testprospect",
+        ),
+        linkedin_analysis=LinkedInAnalysis(),
+        website_analysis=WebsiteAnalysis(scraped_content=scraped_content),
+    )
+
+
+def test_search_scraped_content(tmp_path: Path):
+    """Test full-text search ranking, highlighting, domain filtering and re-indexing"""
+    index = SearchIndex(tmp_path / "search.db")
+    index.index_analysis(_analysis_output("linear", "https://www.linear.app", {
+        "https://linear.app/security": "Security at Linear: SOC 2 Type II audited, security reviews, security training.",
+        "https://linear.app/pricing": "Pricing plans. Enterprise includes security features.",
+        "https://linear.app/broken": "Error: security page timed out",
+    }))
+    index.index_analysis(_analysis_output("acme", "https://acme.com", {
+        "https://acme.com/about": "Acme builds rockets and takes security seriously.",
+    }))
+
+    results = index.search("security")
+    assert [result["url"] for result in results][0] == "https://linear.app/security"
+    assert "https://linear.app/broken" not in [result["url"] for result in results]
+    assert len(results) == 3
+    assert results[0]["score"] >= results[1]["score"] >= results[2]["score"]
+    assert "**Security**" in results[0]["snippet"]
+
+    filtered = index.search("security", domain="acme.com")
+    assert [result["url"] for result in filtered] == ["https://acme.com/about"]
+    assert index.search("security", domain="https://www.linear.app")[0]["domain"] == "linear.app"
+
+    # Re-saving an analysis replaces its pages instead of adding to them
+    index.index_analysis(_analysis_output("linear", "https://www.linear.app", {
+        "https://linear.app/changelog": "Changelog: faster security audits.",
+    }))
+    assert index.search("pricing") == []
+    assert [result["url"] for result in index.search("security", domain="linear.app")] == [
+        "https://linear.app/changelog"
+    ]
+    print(f"Search Test: {len(results)} results, top {results[0]['url']}")
+
+
+def test_search_index_waits_for_other_writers(tmp_path: Path):
+    """Test that indexing waits for another handle's write instead of failing with database is locked"""
+    first = SearchIndex(tmp_path / "search.db")
+    second = SearchIndex(tmp_path / "search.db")
+
+    first._conn.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.2, lambda: first._conn.execute("COMMIT"))
+    release.start()
+    indexed = second.index_analysis(_analysis_output("waiting", "https://linear.app", {
+        "https://linear.app/security": "SOC 2 Type II",
+    }))
+    release.join()
+
+    assert indexed == 1
+    assert [result["request_id"] for result in first.search("soc")] == ["waiting"]
+    print("Concurrent Index Test: second writer waited for the first")
+
+
+@pytest.mark.asyncio
+async def test_search_requires_query(client: httpx.AsyncClient):
+    """Test validation failure when the search query is missing"""
+    response = await client.get("/search")
+    assert response.status_code == 422
+    print(f"Search Without Query Test: {response.status_code} - Expected validation error")
+
+
+def _write_analysis_file(output_dir: Path, name: str, analysis_output: AnalysisOutput) -> Path:
+    filepath = output_dir / name
+    filepath.write_text(analysis_output.model_dump_json(), encoding="utf-8")
+    return filepath
+
+
+def test_export_analyses(tmp_path: Path):
+    """Test partitioned Parquet export, retry of unreadable files and de-duplication of re-saved analyses"""
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    output_dir = tmp_path / "outputs"
+    export_dir = tmp_path / "exports"
+    output_dir.mkdir()
+
+    linear = _analysis_output("linear", "https://www.linear.app", {
+        "https://linear.app/security": "SOC 2 Type II",
+        "https://linear.app/broken": "Error: timed out",
+    })
+    _write_analysis_file(output_dir, "analysis_1.json", linear)
+    # Same partition as "linear", so replacing it rewrites a shared file
+    _write_analysis_file(output_dir, "analysis_2.json", _analysis_output("linear-blog", "https://linear.app", {
+        "https://linear.app/blog": "Engineering blog",
+    }))
+    _write_analysis_file(output_dir, "analysis_3.json", _analysis_output("nosite", None, {}))
+    broken = output_dir / "analysis_4.json"
+    broken.write_text("{not json", encoding="utf-8")
+
+    first = export_analyses(output_dir, export_dir, batch_size=2)
+    assert first["files_scanned"] == 4
+    assert first["files_skipped"] == 1
+    assert first["analyses_exported"] == 3
+    assert first["pages_exported"] == 3
+
+    date = linear.timestamp.date().isoformat()
+    assert (export_dir / "analyses" / f"date={date}" / "domain=linear.app").is_dir()
+    assert (export_dir / "pages" / f"date={date}" / "domain=linear.app").is_dir()
+    analyses_table = ds.dataset(export_dir / "analyses", format="parquet", partitioning="hive").to_table()
+    assert sorted(zip(analyses_table["request_id"].to_pylist(), analyses_table["domain"].to_pylist())) == [
+        ("linear", "linear.app"), ("linear-blog", "linear.app"), ("nosite", "none")
+    ]
+    assert set(analyses_table["date"].to_pylist()) == {date}
+
+    # Fix the unreadable file without making it newer than the watermark, and re-save an analysis
+    broken_mtime = broken.stat().st_mtime_ns
+    _write_analysis_file(output_dir, "analysis_4.json", _analysis_output("fixed", "https://fixed.io", {}))
+    os.utime(broken, ns=(broken_mtime, broken_mtime))
+    linear.website_analysis.scraped_content = {"https://linear.app/changelog": "Faster audits"}
+    _write_analysis_file(output_dir, "analysis_1.json", linear)
+
+    second = export_analyses(output_dir, export_dir, batch_size=2)
+    assert second["files_scanned"] == 2
+    assert second["files_skipped"] == 0
+    assert second["analyses_exported"] == 2
+    assert second["analyses_replaced"] == 1
+
+    analyses_table = ds.dataset(export_dir / "analyses", format="parquet", partitioning="hive").to_table()
+    assert sorted(analyses_table["request_id"].to_pylist()) == ["fixed", "linear", "linear-blog", "nosite"]
+    pages_table = ds.dataset(export_dir / "pages", format="parquet", partitioning="hive").to_table()
+    assert sorted(zip(pages_table["request_id"].to_pylist(), pages_table["url"].to_pylist())) == [
+        ("linear", "https://linear.app/changelog"), ("linear-blog", "https://linear.app/blog")
+    ]
+
+    third = export_analyses(output_dir, export_dir, batch_size=2)
+    assert third["files_scanned"] == 0
+    print(f"Export Test: {first} then {second}")
+
+
+@pytest.fixture
+def admin_token(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Enable the admin endpoints with a known token and a temporary profile directory"""
+    profile_dir = tmp_path / "profiles"
+    profile_dir.mkdir()
+    monkeypatch.setattr(settings, "admin_token", "test-admin-token")
+    monkeypatch.setattr(settings, "profile_dir", profile_dir)
+    return "test-admin-token"
+
+
+@pytest.mark.asyncio
+async def test_profiling_requires_admin_token(admin_token: str, small_outbox: EventOutbox):
+    """Test that /register only accepts profiling requests carrying the admin token"""
+    payload = {"first_name": "Omar", "last_name": "Haddad", "linkedin": "https://www.linkedin.com/in/omarhaddad"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        header_only = await asgi_client.post("/register", json=payload, headers={"X-Profile": "1"})
+        body_only = await asgi_client.post("/register", json={**payload, "profile": True})
+        wrong_token = await asgi_client.post(
+            "/register", json=payload, headers={"X-Profile": "1", "X-Admin-Token": "wrong"}
+        )
+        authorised = await asgi_client.post(
+            "/register", json=payload, headers={"X-Profile": "1", "X-Admin-Token": admin_token}
+        )
+    assert header_only.status_code == 403
+    assert body_only.status_code == 403
+    assert wrong_token.status_code == 403
+    assert authorised.status_code == 200
+    assert small_outbox.backlog == 1
+    print(f"Profiling Authorisation Test: {authorised.status_code} - Request ID: {authorised.json()['request_id']}")
+
+
+def test_export_excludes_concurrent_exports(tmp_path: Path):
+    """Test that an export refuses to run while another process holds the export lock"""
+    pytest.importorskip("pyarrow")
+    export_dir = tmp_path / "exports"
+    export_dir.mkdir()
+    (tmp_path / "outputs").mkdir()
+
+    # A separate open file description stands in for a CLI export in another process
+    with open(export_dir / "_export.lock", "a") as other_export:
+        fcntl.flock(other_export, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with pytest.raises(ExportInProgressError):
+            export_analyses(tmp_path / "outputs", export_dir)
+
+    assert export_analyses(tmp_path / "outputs", export_dir)["files_scanned"] == 0
+    print("Export Lock Test: concurrent export refused")
+
+
+@pytest.mark.asyncio
+async def test_export_requires_admin_token(admin_token: str, monkeypatch: pytest.MonkeyPatch):
+    """Test that the export endpoint is closed without a valid admin token"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        wrong = await asgi_client.post("/exports/analyses", headers={"X-Admin-Token": "wrong"})
+        monkeypatch.setattr(settings, "admin_token", None)
+        unconfigured = await asgi_client.post("/exports/analyses")
+    assert wrong.status_code == 403
+    assert unconfigured.status_code == 404
+    print(f"Export Access Test: {wrong.status_code}, {unconfigured.status_code}")
+
+
+@pytest.mark.asyncio
+async def test_profiled_registration(admin_token: str, isolated_pipeline: Path):
+    """Test that a profiled run stores step timings and cProfile stats served by the admin endpoints"""
+    request_id = str(uuid.uuid4())
+    request_data = _registration_event(request_id)
+    request_data["input_data"]["profile"] = True
+    await processor.run_registration(request_data, LocalStep({}))
+
+    headers = {"X-Admin-Token": admin_token}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        summary = await asgi_client.get(f"/admin/profiles/{request_id}", headers=headers)
+        download = await asgi_client.get(f"/admin/profiles/{request_id}/download", headers=headers)
+        listing = await asgi_client.get("/admin/profiles", headers=headers)
+
+    assert summary.status_code == 200
+    data = summary.json()
+    assert data["reason"] == "requested"
+    assert data["has_cprofile"] is True
+    assert data["error"] is None
+    assert "save-analysis" in data["step_timings"]
+    assert [snapshot["label"] for snapshot in data["memory"]] == ["save_analysis_output"]
+
+    assert download.status_code == 200
+    prof_path = settings.profile_dir / "downloaded.prof"
+    prof_path.write_bytes(download.content)
+    stats = pstats.Stats(str(prof_path))
+    assert any(function[2] == "save_analysis_output" for function in stats.stats)
+
+    assert [profile["request_id"] for profile in listing.json()] == [request_id]
+    print(f"Profiled Registration Test: {data['step_timings']}")
+
+
+@pytest.mark.asyncio
+async def test_failed_run_profile_is_stored(admin_token: str, isolated_pipeline: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that a profiled run that fails still stores its profile and is no longer tracked as active"""
+    async def failing_save(analysis_output: AnalysisOutput) -> str:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(processor, "save_analysis_output", failing_save)
+    request_id = str(uuid.uuid4())
+    request_data = _registration_event(request_id)
+    request_data["input_data"]["profile"] = True
+
+    with pytest.raises(OSError):
+        await processor.run_registration(request_data, LocalStep({}))
+
+    assert request_id not in profiler._active_runs
+    with open(settings.profile_dir / f"{request_id}.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["error"] == "disk full"
+    assert "save-analysis" in summary["step_timings"]
+    print(f"Failed Run Profile Test: {summary['error']}")
+
+
+@pytest.mark.asyncio
+async def test_profile_not_found(admin_token: str):
+    """Test downloading a profile that does not exist"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        response = await asgi_client.get(
+            "/admin/profiles/00000000-0000-0000-0000-000000000000/download",
+            headers={"X-Admin-Token": admin_token},
+        )
+    assert response.status_code == 404
+    print(f"Missing Profile Test: {response.status_code} - Expected not found")
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_closed_by_default(monkeypatch: pytest.MonkeyPatch):
+    """Test that admin endpoints are hidden without ADMIN_TOKEN and forbidden with a wrong token"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        monkeypatch.setattr(settings, "admin_token", None)
+        unconfigured = await asgi_client.get("/admin/profiles")
+        monkeypatch.setattr(settings, "admin_token", "test-admin-token")
+        missing = await asgi_client.get("/admin/profiles")
+        wrong = await asgi_client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"})
+    assert unconfigured.status_code == 404
+    assert missing.status_code == 403
+    assert wrong.status_code == 403
+    print(f"Admin Access Test: {unconfigured.status_code}, {missing.status_code}, {wrong.status_code}")
+
+
+def test_outbox_rejects_events_over_backlog(small_outbox: EventOutbox):
+    """Test that the outbox refuses new events once the backlog limit is reached"""
+    small_outbox.append("registration.submitted", {"request_id": "a"})
+    small_outbox.append("registration.submitted", {"request_id": "b"})
+    with pytest.raises(OutboxFullError) as exc_info:
+        small_outbox.append("registration.submitted", {"request_id": "c"})
+    assert exc_info.value.backlog == 2
+    assert small_outbox.backlog == 2
+
+    small_outbox.ack([event["id"] for event in small_outbox.claim_due(1, lease_seconds=60)])
+    small_outbox.append("registration.submitted", {"request_id": "c"})
+    print("Outbox Backlog Test: events over the limit rejected")
+
+
+def test_outbox_claims_are_exclusive(small_outbox: EventOutbox, tmp_path: Path):
+    """Test that two outboxes sharing a file never claim the same event"""
+    small_outbox.append("registration.submitted", {"request_id": "a"})
+    small_outbox.append("registration.submitted", {"request_id": "b"})
+    other_worker = EventOutbox(tmp_path / "outbox.db", max_backlog=2)
+
+    first = small_outbox.claim_due(1, lease_seconds=60)
+    second = other_worker.claim_due(10, lease_seconds=60)
+    assert [event["data"]["request_id"] for event in first] == ["a"]
+    assert [event["data"]["request_id"] for event in second] == ["b"]
+    assert small_outbox.claim_due(10, lease_seconds=60) == []
+    print("Outbox Claim Test: claims do not overlap")
+
+
+@pytest.mark.asyncio
+async def test_local_executors_sharing_a_queue_run_each_job_once(tmp_path: Path):
+    """Test that executors in separate processes sharing a queue never run the same job twice"""
+    runs = []
+
+    async def handler(data: dict, step: LocalStep) -> None:
+        runs.append(data["n"])
+        await asyncio.sleep(0.01)
+
+    queues = [EventOutbox(tmp_path / "jobs.db", max_backlog=100) for _ in range(2)]
+    executors = [
+        LocalExecutor(queue, {"job": handler}, concurrency=4, max_attempts=1, lease_timeout=60, poll_interval=0.01)
+        for queue in queues
+    ]
+    await executors[0].submit([{"name": "job", "data": {"n": n}} for n in range(40)])
+    for executor in executors:
+        executor.start()
+
+    try:
+        for _ in range(500):
+            if len(runs) >= 40 and not any(executor._running for executor in executors):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        for executor in executors:
+            await executor.stop()
+
+    assert sorted(runs) == list(range(40))
+    assert all(executor.stats["completed"] > 0 for executor in executors)
+    assert queues[0].refresh_backlog() == 0
+    print(f"Shared Queue Test: {[executor.stats for executor in executors]}")
+
+
+@pytest.mark.asyncio
+async def test_register_sheds_load_when_outbox_full(small_outbox: EventOutbox):
+    """Test that /register returns 429 with Retry-After once the outbox is full"""
+    payload = {"first_name": "Load", "last_name": "Shed", "linkedin": "https://www.linkedin.com/in/loadshed"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as asgi_client:
+        for _ in range(2):
+            response = await asgi_client.post("/register", json=payload)
+            assert response.status_code == 200
+        response = await asgi_client.post("/register", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    print(f"Load Shedding Test: {response.status_code} - Retry-After {response.headers['Retry-After']}")
+
+
 def test_outputs_directory_exists():
     """Test that outputs directory exists"""
     outputs_dir = Path("outputs")